@@ -0,0 +1,128 @@
+# _ga_kernels.py
+# Numeric kernels used by GeneticAlgorithmTimetable (app.py).
+# Compiled with numba when it is installed, otherwise they run as plain NumPy.
+
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit when numba is not installed"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# One individual is a packed (n_events, N_EVENT_COLUMNS) array, rows grouped by kind
+# in the order lectures, practicals, mentoring. ID 0 stands for None.
+EV_KIND, EV_SUBJECT, EV_FACULTY, EV_ROOM, EV_BATCH, EV_DAY, EV_START, EV_END = range(8)
+N_EVENT_COLUMNS = 8
+EVENT_DTYPE = np.int32
+
+LECTURE, PRACTICAL, MENTORING = 0, 1, 2
+SESSION_TYPES = ('Lecture', 'Practical', 'Mentoring')  # Indexed by kind
+
+# Individuals per evaluate_block call; evaluate_population amortizes its per-call NumPy
+# overhead over the block, and a padded block of the sample class still fits in L2
+BLOCK_SIZE = 32
+
+# Picklable, ORM-free description of what evaluate_population needs to know
+FitnessProblem = namedtuple('FitnessProblem', [
+    'n_days',
+    'n_slots',
+    'subject_lookup',      # int64 array: subject_id -> column in required_hours
+    'required_hours',      # int64 (2, n_subjects): lecture hours, practical hours
+    'penalty_weights',     # int64 (2,): penalty per missing lecture / practical hour
+    'required_mentoring',  # number of batches with a mentor
+])
+
+
+@njit(cache=True)
+def crossover_kernel(parents, bounds, pairs, width):
+    """Children of each (a, b) row of pairs: the first half of each kind of a's sessions, the rest of b's"""
+    children = np.zeros((pairs.shape[0], width, parents.shape[2]), dtype=parents.dtype)
+    counts = np.zeros(pairs.shape[0], dtype=np.int64)
+    for i in range(pairs.shape[0]):
+        a, b = pairs[i, 0], pairs[i, 1]
+        n = 0
+        for kind in range(bounds.shape[1] - 1):
+            start1, end1 = bounds[a, kind], bounds[a, kind + 1]
+            start2, end2 = bounds[b, kind], bounds[b, kind + 1]
+            if end1 > start1 and end2 > start2:
+                split = (end1 - start1) // 2
+                children[i, n:n + split] = parents[a, start1:start1 + split]
+                n += split
+                tail = max(end2 - start2 - split, 0)
+                children[i, n:n + tail] = parents[b, end2 - tail:end2]
+                n += tail
+        counts[i] = n
+    return children, counts
+
+
+def stack_events(individuals):
+    """Pad the individuals' events into one (n, max_events, N_EVENT_COLUMNS) array plus row counts"""
+    counts = np.array([len(ind['events']) for ind in individuals], dtype=np.int64)
+    stacked = np.zeros((len(individuals), counts.max(initial=0), N_EVENT_COLUMNS), dtype=EVENT_DTYPE)
+    for i, ind in enumerate(individuals):
+        stacked[i, :counts[i]] = ind['events']
+    return stacked, counts
+
+
+def evaluate_population(stacked, counts, problem):
+    """Fitness of every padded individual at once, as batched reductions over the event axis"""
+    n_individuals, max_events = stacked.shape[:2]
+    owner = np.repeat(np.arange(n_individuals, dtype=np.int64), max_events).reshape(n_individuals, max_events)
+    valid = np.arange(max_events) < counts[:, None]
+    kinds = stacked[..., EV_KIND]
+    lectures = valid & (kinds == LECTURE)
+    practicals = valid & (kinds == PRACTICAL)
+    penalties = np.zeros(n_individuals, dtype=np.int64)
+
+    # 1. Faculty overload, one row of per-faculty hours per individual (column 0 = no faculty)
+    faculty = stacked[..., EV_FACULTY].astype(np.int64)
+    n_faculty = int(faculty.max(initial=0)) + 1
+    hours = np.where(practicals, 2, 1) * valid
+    faculty_hours = np.bincount((owner * n_faculty + faculty).ravel(), hours.ravel(),
+                                minlength=n_individuals * n_faculty).reshape(n_individuals, n_faculty)
+    penalties += np.maximum(faculty_hours[:, 1:] - 20, 0).sum(axis=1).astype(np.int64) * 10
+
+    # 2. Room conflicts: lectures minus distinct (room, day, slot) cells, per individual
+    n_cells = problem.n_days * problem.n_slots
+    room_keys = (stacked[..., EV_ROOM].astype(np.int64) * n_cells
+                 + stacked[..., EV_DAY] * problem.n_slots + stacked[..., EV_START])
+    n_keys = int(room_keys.max(initial=0)) + 1
+    distinct = np.unique(owner[lectures] * n_keys + room_keys[lectures]) // n_keys
+    penalties += (lectures.sum(axis=1) - np.bincount(distinct, minlength=n_individuals)) * 50
+
+    # 3. Subject hours shortfall (the extra last column collects subjects outside the class)
+    subjects = problem.subject_lookup[stacked[..., EV_SUBJECT]]
+    n_columns = problem.required_hours.shape[1] + 1
+    for row, (mask, hours_each) in enumerate(((lectures, 1), (practicals, 2))):
+        actual = np.bincount(owner[mask] * n_columns + subjects[mask],
+                             minlength=n_individuals * n_columns).reshape(n_individuals, n_columns)
+        shortfall = np.maximum(problem.required_hours[row] - actual[:, :-1] * hours_each, 0)
+        penalties += shortfall.sum(axis=1) * problem.penalty_weights[row]
+
+    # 4. Missing mentoring sessions
+    n_mentoring = (valid & (kinds == MENTORING)).sum(axis=1)
+    penalties += np.maximum(problem.required_mentoring - n_mentoring, 0) * 100
+
+    return np.maximum(1000 - penalties, 0)
+
+
+def evaluate_block(block, counts, problem):
+    """Fitness of each padded individual in a block of stack_events output"""
+    return evaluate_population(block, counts, problem).tolist()
+
+
+def warm_up():
+    """Trigger numba compilation once so the first GA run doesn't pay for it"""
+    if not NUMBA_AVAILABLE:
+        return
+    crossover_kernel(np.zeros((1, 1, N_EVENT_COLUMNS), dtype=EVENT_DTYPE),
+                     np.zeros((1, 4), dtype=np.int64), np.zeros((1, 2), dtype=np.int64), 1)
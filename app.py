@@ -1,44 +1,60 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, abort
 from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
+from sqlalchemy import event, select, func, or_, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, load_only, raiseload
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, time
+import atexit
 import json
+import logging
 import os
+import queue
 import random
-import copy
-from dotenv import load_dotenv
+import uuid
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
+import numpy as np
+from config import Config
+from _ga_kernels import (evaluate_block, stack_events, warm_up, crossover_kernel, FitnessProblem, BLOCK_SIZE,
+                         EV_KIND, EV_ROOM, EV_DAY,
+                         EV_START, EV_END, N_EVENT_COLUMNS, EVENT_DTYPE, LECTURE, PRACTICAL,
+                         MENTORING, SESSION_TYPES)
 
-load_dotenv()
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+except ImportError:
+    password_hasher = None  # Fall back to werkzeug hashes
+
+# Log records are queued and written by a listener thread, so request threads never wait
+# on the stream. app.logger has no handler of its own and propagates here.
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+log_listener = QueueListener(log_queue, log_handler)
+logging.getLogger().addHandler(QueueHandler(log_queue))
+logging.getLogger().setLevel(logging.INFO)
+log_listener.start()
+atexit.register(log_listener.stop)
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-key-12345'
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///database.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Timetable settings
-app.config['DAYS'] = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-app.config['TIME_SLOTS'] = [
-    ('09:40', '10:40'),
-    ('10:50', '11:50'),
-    ('11:50', '12:40'),  # Lunch break
-    ('12:40', '13:40'),
-    ('13:50', '14:50'),
-    ('15:00', '16:00'),
-    ('16:10', '17:10')
-]
-app.config['LECTURE_SLOT_INDICES'] = [0, 1, 3, 4, 5, 6]
-app.config['PRACTICAL_SLOTS'] = [('14:00', '16:00'), ('15:00', '17:10')]
-
-# Genetic Algorithm parameters
-app.config['POPULATION_SIZE'] = 100
-app.config['GENERATIONS'] = 500
-app.config['MUTATION_RATE'] = 0.1
-app.config['ELITE_SIZE'] = 20
+app.config.from_object(Config)
+
+# Timetable settings, as module-level names for the views
+DAYS, TIME_SLOTS, SLOT_INDICES = Config.DAYS, Config.TIME_SLOTS, Config.SLOT_INDICES
 
 db = SQLAlchemy(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
+login_manager.session_protection = 'basic'
+cache = Cache(app)
 
 # Models (defined here to avoid circular imports)
 class User(UserMixin, db.Model):
@@ -50,10 +66,30 @@ class User(UserMixin, db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        if password_hasher is not None:
+            self.password_hash = password_hasher.hash(password)
+        else:
+            self.password_hash = generate_password_hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not self.password_hash:
+            return False
+        if self.password_hash.startswith('$argon2'):
+            if password_hasher is None:
+                return False
+            try:
+                password_hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            if password_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+            return True
+        if not check_password_hash(self.password_hash, password):
+            return False
+        # Upgrade legacy werkzeug hashes on the next successful login
+        if password_hasher is not None:
+            self.set_password(password)
+        return True
 
 class Department(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -63,6 +99,8 @@ class Department(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     classes = db.relationship('Class', backref='department', lazy=True)
     faculty = db.relationship('Faculty', backref='department', lazy=True)
+    subjects = db.relationship('Subject', backref='department', lazy=True)
+    rooms = db.relationship('Room', backref='department', lazy=True)
 
 class Class(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -83,12 +121,13 @@ class Batch(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(10), nullable=False)  # TB1, TB2, TB3
     code = db.Column(db.String(30), unique=True, nullable=False)
-    class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False, index=True)
     mentor_id = db.Column(db.Integer, db.ForeignKey('faculty.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     practical_slots = db.relationship('PracticalSlot', backref='batch', lazy=True)
+    timetable_entries = db.relationship('Timetable', backref='batch', lazy=True)
 
 class Subject(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -105,6 +144,8 @@ class Subject(db.Model):
     class_subjects = db.relationship('ClassSubject', backref='subject_ref', lazy=True)
 
 class ClassSubject(db.Model):
+    __table_args__ = (db.Index('ix_class_subject_pair', 'class_id', 'subject_id', unique=True),)
+    
     id = db.Column(db.Integer, primary_key=True)
     class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
@@ -145,6 +186,8 @@ class Room(db.Model):
     timetable_entries = db.relationship('Timetable', backref='room', lazy=True)
 
 class Timetable(db.Model):
+    __table_args__ = (db.Index('ix_timetable_lookup', 'class_id', 'day', 'slot_number'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False)
     day = db.Column(db.String(10), nullable=False)
@@ -161,7 +204,7 @@ class Timetable(db.Model):
 
 class PracticalSlot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False)
+    class_id = db.Column(db.Integer, db.ForeignKey('class.id'), nullable=False, index=True)
     batch_id = db.Column(db.Integer, db.ForeignKey('batch.id'), nullable=False)
     subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
     faculty_id = db.Column(db.Integer, db.ForeignKey('faculty.id'))
@@ -175,23 +218,133 @@ class PracticalSlot(db.Model):
 def load_user(user_id):
     return db.session.get(User, int(user_id))
 
+# Cached lists for dropdowns and listings. Cache hits are detached copies, so templates
+# may only follow the relationships loaded here.
+@cache.memoize()
+def all_departments():
+    return Department.query.all()
+
+@cache.memoize()
+def all_faculty():
+    return Faculty.query.options(joinedload(Faculty.department)).all()
+
+@cache.memoize()
+def all_subjects():
+    return Subject.query.options(joinedload(Subject.department)).all()
+
+def invalidate_reference_data():
+    """Forget the cached lists after departments, faculty or subjects change"""
+    cache.delete_memoized(all_departments)
+    cache.delete_memoized(all_faculty)
+    cache.delete_memoized(all_subjects)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune each new SQLite connection: WAL so reads don't wait on commits, one fsync per checkpoint"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')  # 256 MiB
+    cursor.execute('PRAGMA cache_size=-65536')    # 64 MiB
+    cursor.close()
+
+def raise_on_lazy_load(orm_execute_state):
+    """Add raiseload('*') to every ORM SELECT, so relationships a query didn't eager-load raise on access"""
+    if orm_execute_state.is_select:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload('*', sql_only=True))
+
 
 # Create tables before first request
 with app.app_context():
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
+    if app.config['RAISE_ON_LAZY_LOAD']:
+        event.listen(db.session, 'do_orm_execute', raise_on_lazy_load)
     db.create_all()
+    # create_all() skips existing tables, so add any indexes they are missing
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(db.engine, checkfirst=True)
+            except IntegrityError:
+                # Rows saved before the unique index existed may clash; start without it
+                app.logger.warning('Could not create unique index %s: %s already has duplicate rows',
+                                   index.name, table.name)
     # Create default admin user if not exists
-    if not User.query.filter_by(username='admin').first():
+    if not db.session.query(User.query.filter_by(username='admin').exists()).scalar():
         admin = User(username='admin', email='admin@college.edu', is_admin=True)
         admin.set_password('admin123')
         db.session.add(admin)
         db.session.commit()
-        print("Default admin user created: username='admin', password='admin123'")
+        app.logger.info("Default admin user created: username='admin', password='admin123'")
+
+# Compile the GA kernels up front (no-op without numba)
+warm_up()
+
+# One fitness worker pool shared by every timetable generation; workers start on first use
+app.ga_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+atexit.register(lambda: app.ga_pool.shutdown())
+
+def reset_ga_pool():
+    """Replace the worker pool once it is broken (a worker died), so later runs can use it"""
+    app.ga_pool.shutdown(wait=False, cancel_futures=True)
+    app.ga_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+
+# Timetable generation runs off the request thread, one job at a time. Job state lives in
+# the cache (see set_generation_job), so abandoned jobs expire and, with a shared backend
+# such as RedisCache, any web worker can answer the status polls.
+app.ga_jobs = ThreadPoolExecutor(max_workers=1)
+atexit.register(app.ga_jobs.shutdown)
+
+# Plain snapshots of the rows the GA reads, so it never touches ORM instances
+# (no instrumented attribute access in the hot loops, and picklable for worker processes)
+ClassSubjectSnap = namedtuple('ClassSubjectSnap',
+                              'id subject_id faculty_id lecture_slots_per_week practical_slots_per_week')
+BatchSnap = namedtuple('BatchSnap', 'id mentor_id')
+RoomSnap = namedtuple('RoomSnap', 'id room_type')
+
+@cache.memoize(timeout=600)
+def load_ga_inputs(class_id):
+    """Snapshot of everything GeneticAlgorithmTimetable reads for a class"""
+    # One column-only SELECT per table, no ORM objects
+    return {
+        'class_name': db.session.execute(select(Class.name).where(Class.id == class_id)).scalar_one(),
+        'class_subjects': [ClassSubjectSnap(*row) for row in db.session.execute(
+            select(ClassSubject.id, ClassSubject.subject_id, ClassSubject.faculty_id,
+                   ClassSubject.lecture_slots_per_week, ClassSubject.practical_slots_per_week)
+            .where(ClassSubject.class_id == class_id))],
+        'batches': [BatchSnap(*row) for row in db.session.execute(
+            select(Batch.id, Batch.mentor_id).where(Batch.class_id == class_id))],
+        'rooms': [RoomSnap(*row) for row in db.session.execute(select(Room.id, Room.room_type))]
+    }
+
+def invalidate_ga_inputs(class_id=None):
+    """Forget the cached GA inputs of one class, or of every class when class_id is None"""
+    if class_id is None:
+        cache.delete_memoized(load_ga_inputs)
+    else:
+        cache.delete_memoized(load_ga_inputs, class_id)
 
 # Genetic Algorithm Class (moved here to avoid circular imports)
 class GeneticAlgorithmTimetable:
+    # Lunch break rows are the same for every class; save_to_database only adds class_id
+    BREAK_TEMPLATE = [{
+        'day': day,
+        'slot_number': 2,
+        'start_time': '11:50',
+        'end_time': '12:40',
+        'subject_id': None,
+        'faculty_id': None,
+        'room_id': None,
+        'batch_id': None,
+        'session_type': 'Break',
+        'is_break': True
+    } for day in app.config['DAYS']]
+    
     def __init__(self, class_id):
         self.class_id = class_id
-        self.class_obj = Class.query.get(class_id)
+        inputs = load_ga_inputs(class_id)
+        self.class_name = inputs['class_name']
         self.days = app.config['DAYS']
         self.time_slots = [
             (0, '09:40', '10:40', False),   # Slot 1
@@ -204,31 +357,55 @@ class GeneticAlgorithmTimetable:
         ]
         self.lecture_slots = app.config['LECTURE_SLOT_INDICES']
         
-        # Get all required data
-        self.class_subjects = ClassSubject.query.filter_by(class_id=class_id).all()
-        self.batches = Batch.query.filter_by(class_id=class_id).all()
-        self.faculty_list = Faculty.query.all()
-        self.rooms = Room.query.all()
+        # Get all required data (cached until a route changes it)
+        self.class_subjects = inputs['class_subjects']
+        self.batches = inputs['batches']
+        self.rooms = inputs['rooms']
         self.classrooms = [r for r in self.rooms if r.room_type == 'Classroom']
         self.labs = [r for r in self.rooms if r.room_type == 'Lab']
         
+        # Unsaved placeholders (room_id None) when no rooms of a type exist
         if not self.classrooms:
-            self.classrooms = [Room(room_number='Default Classroom', room_type='Classroom', capacity=60)]
+            self.classrooms = [RoomSnap(None, 'Classroom')]
         if not self.labs:
-            self.labs = [Room(room_number='Default Lab', room_type='Lab', capacity=40)]
+            self.labs = [RoomSnap(None, 'Lab')]
+        # Bit i of a room mask stands for classrooms[i] / labs[i] (see new_conflict_index)
+        self.room_bits = {'rooms': {r.id: 1 << i for i, r in enumerate(self.classrooms)},
+                          'labs': {r.id: 1 << i for i, r in enumerate(self.labs)}}
+        self.all_classrooms = (1 << len(self.classrooms)) - 1
+        self.all_labs = (1 << len(self.labs)) - 1
+        
+        # Lookup tables for the vectorized fitness function
+        self.problem = FitnessProblem(
+            n_days=len(self.days),
+            n_slots=len(self.time_slots),
+            subject_lookup=self.build_subject_lookup(),
+            required_hours=np.array([
+                [cs.lecture_slots_per_week for cs in self.class_subjects],
+                [cs.practical_slots_per_week * 2 for cs in self.class_subjects]  # 2 hours each
+            ], dtype=np.int64).reshape(2, -1),
+            penalty_weights=np.array([30, 40], dtype=np.int64),
+            required_mentoring=len([b for b in self.batches if b.mentor_id])
+        )
+        
+        # Every (day, slot) cell sessions can start in; create_individual samples them with self.rng
+        self.rng = np.random.default_rng()
+        self.lecture_grid = [(d, s) for d in range(len(self.days)) for s in self.lecture_slots if s != 2]
+        self.lecture_cells = [(d, s, self.cell_bit(d, s)) for d, s in self.lecture_grid]
+        self.practical_grid = [(d, s) for d in range(len(self.days)) for s in (4, 5)]  # Afternoon starts
         
         # Initialize population
         self.population = []
         self.best_solution = None
         self.best_fitness = float('-inf')
         
+        # Master-slave fitness evaluation runs on the shared app.ga_pool
+        self.workers = os.cpu_count() or 1
+        
     def create_individual(self):
         """Create one feasible timetable individual"""
-        individual = {
-            'lectures': [],
-            'practicals': [],
-            'mentoring': []
-        }
+        events = []  # Rows of the packed individual, see _ga_kernels
+        conflicts = self.new_conflict_index()
         
         # Try to create a feasible individual
         max_attempts = 50
@@ -236,40 +413,23 @@ class GeneticAlgorithmTimetable:
             try:
                 # 1. Schedule lectures
                 for class_subject in self.class_subjects:
-                    lecture_count = class_subject.lecture_slots_per_week
-                    scheduled = 0
+                    # Every free (day, slot) cell for this faculty that still has a classroom,
+                    # with the mask of its free classrooms
+                    faculty_busy = conflicts['faculty'].get(class_subject.faculty_id, 0)
+                    candidates = []
+                    for day_idx, slot_idx, bit in self.lecture_cells:
+                        free = self.all_classrooms & ~conflicts['rooms'][bit]
+                        if free and not (class_subject.faculty_id and faculty_busy >> bit & 1):
+                            candidates.append((day_idx, slot_idx, free))
                     
-                    while scheduled < lecture_count:
-                        day = random.choice(self.days)
-                        slot_idx = random.choice(self.lecture_slots)
-                        
-                        # Skip lunch break
-                        if slot_idx == 2:
-                            continue
-                            
-                        # Check faculty availability
-                        faculty_busy = self.check_faculty_busy(individual, class_subject.faculty_id, day, slot_idx)
-                        if faculty_busy:
-                            continue
-                        
-                        # Find available classroom
-                        classroom = self.find_available_classroom(individual, day, slot_idx)
-                        if not classroom:
-                            continue
-                        
-                        slot = self.time_slots[slot_idx]
-                        individual['lectures'].append({
-                            'class_subject_id': class_subject.id,
-                            'subject_id': class_subject.subject_id,
-                            'faculty_id': class_subject.faculty_id,
-                            'room_id': classroom.id,
-                            'day': day,
-                            'slot_number': slot_idx,
-                            'start_time': slot[1],
-                            'end_time': slot[2],
-                            'session_type': 'Lecture'
-                        })
-                        scheduled += 1
+                    # Sample distinct cells without replacement; schedule what fits if capacity is short
+                    lecture_count = min(class_subject.lecture_slots_per_week, len(candidates))
+                    for i in self.rng.choice(len(candidates), size=lecture_count, replace=False).tolist():
+                        day_idx, slot_idx, free = candidates[i]
+                        classroom = self.pick_room(self.classrooms, free)
+                        self.book(conflicts, 'rooms', class_subject.faculty_id, classroom.id, day_idx, [slot_idx])
+                        events.append((LECTURE, class_subject.subject_id, class_subject.faculty_id or 0,
+                                       classroom.id or 0, 0, day_idx, slot_idx, slot_idx))
                 
                 # 2. Schedule practicals for each batch
                 for batch in self.batches:
@@ -277,433 +437,430 @@ class GeneticAlgorithmTimetable:
                         practical_count = class_subject.practical_slots_per_week
                         scheduled = 0
                         
-                        while scheduled < practical_count:
-                            # Schedule 2-hour practical in afternoon
-                            day = random.choice(self.days)
-                            # Use slots 4-5 or 5-6 for practicals (afternoon)
-                            start_slot = random.choice([4, 5])
+                        # Schedule 2-hour practicals in the afternoon (slots 4-5 or 5-6), walking
+                        # the cells in a shuffled order so each one is tried at most once
+                        for cell in self.rng.permutation(len(self.practical_grid)).tolist():
+                            if scheduled >= practical_count:
+                                break
+                            day_idx, start_slot = self.practical_grid[cell]
                             end_slot = start_slot + 1
                             
-                            if end_slot > 6:  # Ensure within bounds
-                                continue
-                            
                             # Check faculty availability for both slots
-                            faculty_busy = False
-                            for slot in [start_slot, end_slot]:
-                                if self.check_faculty_busy(individual, class_subject.faculty_id, day, slot):
-                                    faculty_busy = True
-                                    break
-                            
-                            if faculty_busy:
+                            if self.check_faculty_busy(conflicts, class_subject.faculty_id, day_idx,
+                                                       start_slot, end_slot):
                                 continue
                             
                             # Find available lab
-                            lab = self.find_available_lab(individual, day, start_slot, end_slot)
+                            lab = self.find_available_lab(conflicts, day_idx, start_slot, end_slot)
                             if not lab:
                                 continue
                             
-                            individual['practicals'].append({
-                                'batch_id': batch.id,
-                                'subject_id': class_subject.subject_id,
-                                'faculty_id': class_subject.faculty_id,
-                                'room_id': lab.id,
-                                'day': day,
-                                'start_slot': start_slot,
-                                'end_slot': end_slot,
-                                'start_time': self.time_slots[start_slot][1],
-                                'end_time': self.time_slots[end_slot][2],
-                                'session_type': 'Practical'
-                            })
+                            self.book(conflicts, 'labs', class_subject.faculty_id, lab.id, day_idx,
+                                      range(start_slot, end_slot + 1))
+                            events.append((PRACTICAL, class_subject.subject_id, class_subject.faculty_id or 0,
+                                           lab.id or 0, batch.id, day_idx, start_slot, end_slot))
                             scheduled += 1
                 
                 # 3. Schedule mentoring sessions
                 for batch in self.batches:
                     if batch.mentor_id:
-                        for _ in range(20):  # Try 20 times
-                            day = random.choice(self.days)
-                            slot_idx = random.choice(self.lecture_slots)
+                        # First free cell in a shuffled walk of the lecture grid
+                        for cell in self.rng.permutation(len(self.lecture_grid)).tolist():
+                            day_idx, slot_idx = self.lecture_grid[cell]
                             
-                            # Skip lunch break
-                            if slot_idx == 2:
-                                continue
-                                
                             # Check mentor availability
-                            if self.check_faculty_busy(individual, batch.mentor_id, day, slot_idx):
+                            if self.check_faculty_busy(conflicts, batch.mentor_id, day_idx, slot_idx):
                                 continue
                             
-                            classroom = self.find_available_classroom(individual, day, slot_idx)
+                            classroom = self.find_available_classroom(conflicts, day_idx, slot_idx)
                             if not classroom:
                                 continue
                             
-                            slot = self.time_slots[slot_idx]
-                            individual['mentoring'].append({
-                                'batch_id': batch.id,
-                                'faculty_id': batch.mentor_id,
-                                'room_id': classroom.id,
-                                'day': day,
-                                'slot_number': slot_idx,
-                                'start_time': slot[1],
-                                'end_time': slot[2],
-                                'session_type': 'Mentoring'
-                            })
+                            self.book(conflicts, 'rooms', batch.mentor_id, classroom.id, day_idx, [slot_idx])
+                            events.append((MENTORING, 0, batch.mentor_id, classroom.id or 0,
+                                           batch.id, day_idx, slot_idx, slot_idx))
                             break
                 
-                return individual
+                return self.pack(events)
                 
             except Exception as e:
                 # Reset and try again
-                individual = {'lectures': [], 'practicals': [], 'mentoring': []}
+                events = []
+                conflicts = self.new_conflict_index()
                 continue
         
         # If we couldn't create a feasible individual after max attempts, return what we have
-        return individual
-    
-    def check_faculty_busy(self, individual, faculty_id, day, slot_number):
-        """Check if faculty is already busy at given day and slot"""
+        return self.pack(events)
+    
+    def pack(self, events):
+        """Individual holding the given event rows as one packed array"""
+        return {'events': np.array(events, dtype=EVENT_DTYPE).reshape(-1, N_EVENT_COLUMNS)}
+    
+    @staticmethod
+    def kind_bounds(events):
+        """Row offsets where lectures, practicals and mentoring start, plus the end"""
+        return np.searchsorted(events[:, EV_KIND], (LECTURE, PRACTICAL, MENTORING, MENTORING + 1)).tolist()
+    
+    def build_subject_lookup(self):
+        """Array mapping subject_id to its column in required_hours"""
+        n_subjects = len(self.class_subjects)
+        size = max((cs.subject_id for cs in self.class_subjects), default=0) + 1
+        lookup = np.full(size, n_subjects, dtype=np.int64)
+        for i, cs in enumerate(self.class_subjects):
+            lookup[cs.subject_id] = i
+        return lookup
+    
+    def __getstate__(self):
+        """Pickle for create_individuals: the population stays behind"""
+        state = dict(self.__dict__)
+        state['population'] = []
+        state['best_solution'] = None
+        return state
+    
+    def new_conflict_index(self):
+        """Empty busy bitmasks: a week mask per faculty id (bits from cell_bit), and per cell
+        ('rooms' / 'labs') a mask of the room_bits taken"""
+        n_cells = len(self.days) << 3
+        return {'faculty': {}, 'rooms': [0] * n_cells, 'labs': [0] * n_cells}
+    
+    @staticmethod
+    def cell_bit(day_idx, slot):
+        """Bit position of a (day index, slot) cell in a week mask: day*8 + slot"""
+        return (day_idx << 3) | slot
+    
+    def slot_mask(self, day_idx, start_slot, end_slot):
+        """Week mask with the cells of slots start_slot..end_slot on one day set"""
+        return ((2 << (end_slot - start_slot)) - 1) << self.cell_bit(day_idx, start_slot)
+    
+    def book(self, conflicts, rooms, faculty_id, room_id, day_idx, slots):
+        """Mark faculty and room (in the 'rooms' or 'labs' index) busy for the given slots"""
+        room_bit = self.room_bits[rooms][room_id]
+        busy = conflicts[rooms]
+        for slot in slots:
+            busy[self.cell_bit(day_idx, slot)] |= room_bit
+        if faculty_id:
+            faculty = conflicts['faculty']
+            faculty[faculty_id] = faculty.get(faculty_id, 0) | self.slot_mask(day_idx, slots[0], slots[-1])
+    
+    def check_faculty_busy(self, conflicts, faculty_id, day_idx, slot_number, end_slot=None):
+        """Check if faculty is already busy at given day and slot (or any slot up to end_slot)"""
         if not faculty_id:
             return False
-            
-        # Check lectures
-        for lecture in individual['lectures']:
-            if (lecture['faculty_id'] == faculty_id and 
-                lecture['day'] == day and 
-                lecture['slot_number'] == slot_number):
-                return True
-        
-        # Check practicals
-        for practical in individual['practicals']:
-            if practical['faculty_id'] == faculty_id and practical['day'] == day:
-                if slot_number >= practical['start_slot'] and slot_number <= practical['end_slot']:
-                    return True
         
-        # Check mentoring
-        for mentoring in individual['mentoring']:
-            if (mentoring['faculty_id'] == faculty_id and 
-                mentoring['day'] == day and 
-                mentoring['slot_number'] == slot_number):
-                return True
-        
-        return False
-    
-    def find_available_classroom(self, individual, day, slot_number):
+        mask = self.slot_mask(day_idx, slot_number, slot_number if end_slot is None else end_slot)
+        return bool(conflicts['faculty'].get(faculty_id, 0) & mask)
+    
+    @staticmethod
+    def pick_room(rooms, free):
+        """Random room among the set bits of free (bit i stands for rooms[i]), or None"""
+        positions = []
+        while free:
+            low = free & -free
+            positions.append(low.bit_length() - 1)
+            free ^= low
+        return rooms[random.choice(positions)] if positions else None
+    
+    def find_available_classroom(self, conflicts, day_idx, slot_number):
         """Find available classroom for given time slot"""
         if not self.classrooms:
             return None
-            
-        available_classrooms = self.classrooms.copy()
         
-        # Remove classrooms that are occupied
-        for lecture in individual['lectures']:
-            if lecture['day'] == day and lecture['slot_number'] == slot_number:
-                available_classrooms = [r for r in available_classrooms if r.id != lecture['room_id']]
-        
-        for mentoring in individual['mentoring']:
-            if mentoring['day'] == day and mentoring['slot_number'] == slot_number:
-                available_classrooms = [r for r in available_classrooms if r.id != mentoring['room_id']]
-        
-        return random.choice(available_classrooms) if available_classrooms else None
+        free = self.all_classrooms & ~conflicts['rooms'][self.cell_bit(day_idx, slot_number)]
+        return self.pick_room(self.classrooms, free)
     
-    def find_available_lab(self, individual, day, start_slot, end_slot):
+    def find_available_lab(self, conflicts, day_idx, start_slot, end_slot):
         """Find available lab for 2-hour practical"""
         if not self.labs:
             return None
-            
-        available_labs = self.labs.copy()
-        
-        # Remove labs that are occupied during these slots
-        for practical in individual['practicals']:
-            if practical['day'] == day:
-                # Check for overlap
-                if not (end_slot < practical['start_slot'] or start_slot > practical['end_slot']):
-                    available_labs = [r for r in available_labs if r.id != practical['room_id']]
-        
-        return random.choice(available_labs) if available_labs else None
-    
-    def calculate_fitness(self, individual):
-        """Calculate fitness score for individual"""
-        fitness = 1000  # Base score
-        
-        # Penalties for violations
-        penalties = 0
         
-        # 1. Check faculty overload
-        faculty_hours = {}
-        for lecture in individual['lectures']:
-            fid = lecture['faculty_id']
-            if fid:
-                faculty_hours[fid] = faculty_hours.get(fid, 0) + 1
+        busy = conflicts['labs']
+        taken = 0
+        for slot in range(start_slot, end_slot + 1):
+            taken |= busy[self.cell_bit(day_idx, slot)]
+        return self.pick_room(self.labs, self.all_labs & ~taken)
+    
+    def crossover_pairs(self, parents, pairs):
+        """One child per (a, b) row of pairs, indexing into parents, from a single kernel call"""
+        # Simple crossover: take half of each kind of session from each parent
+        stacked, _ = stack_events(parents)
+        bounds = np.array([self.kind_bounds(ind['events']) for ind in parents], dtype=np.int64)
+        width = int(np.diff(bounds, axis=1).max(axis=0).sum())  # Longest possible child
+        block, counts = crossover_kernel(stacked, bounds, pairs, width)
+        children = [{'events': events[:n]} for events, n in zip(block, counts)]
         
-        for practical in individual['practicals']:
-            fid = practical['faculty_id']
-            if fid:
-                faculty_hours[fid] = faculty_hours.get(fid, 0) + 2
+        # Crossing an individual with itself reproduces it, so its fitness still holds
+        for child, (a, b) in zip(children, pairs.tolist()):
+            if a == b and '_fitness' in parents[a]:
+                child['_fitness'] = parents[a]['_fitness']
         
-        for mentoring in individual['mentoring']:
-            fid = mentoring['faculty_id']
-            if fid:
-                faculty_hours[fid] = faculty_hours.get(fid, 0) + 1
-        
-        # Check against faculty max hours (simplified)
-        for fid, hours in faculty_hours.items():
-            if hours > 20:  # Default max hours
-                penalties += (hours - 20) * 10
-        
-        # 2. Check room conflicts
-        room_schedule = {}
-        for lecture in individual['lectures']:
-            key = (lecture['room_id'], lecture['day'], lecture['slot_number'])
-            if key in room_schedule:
-                penalties += 50
-            room_schedule[key] = True
-        
-        # 3. Check if all subjects have required hours (simplified)
-        subject_lecture_hours = {}
-        subject_practical_hours = {}
-        
-        for lecture in individual['lectures']:
-            sid = lecture['subject_id']
-            subject_lecture_hours[sid] = subject_lecture_hours.get(sid, 0) + 1
-        
-        for practical in individual['practicals']:
-            sid = practical['subject_id']
-            subject_practical_hours[sid] = subject_practical_hours.get(sid, 0) + 2
-        
-        for class_subject in self.class_subjects:
-            required_lecture = class_subject.lecture_slots_per_week
-            required_practical = class_subject.practical_slots_per_week * 2  # 2 hours each
-            
-            actual_lecture = subject_lecture_hours.get(class_subject.subject_id, 0)
-            actual_practical = subject_practical_hours.get(class_subject.subject_id, 0)
-            
-            if actual_lecture < required_lecture:
-                penalties += (required_lecture - actual_lecture) * 30
-            if actual_practical < required_practical:
-                penalties += (required_practical - actual_practical) * 40
-        
-        # 4. Reward for having all batches with mentoring
-        mentoring_count = len(individual['mentoring'])
-        required_mentoring = len([b for b in self.batches if b.mentor_id])
-        if mentoring_count < required_mentoring:
-            penalties += (required_mentoring - mentoring_count) * 100
-        
-        fitness -= penalties
-        return max(fitness, 0)  # Ensure fitness is not negative
-    
-    def crossover(self, parent1, parent2):
-        """Create child through crossover"""
-        child = {
-            'lectures': [],
-            'practicals': [],
-            'mentoring': []
-        }
-        
-        # Simple crossover: take half from each parent
-        if parent1['lectures'] and parent2['lectures']:
-            split = len(parent1['lectures']) // 2
-            child['lectures'] = parent1['lectures'][:split] + parent2['lectures'][split:]
-        
-        if parent1['practicals'] and parent2['practicals']:
-            split = len(parent1['practicals']) // 2
-            child['practicals'] = parent1['practicals'][:split] + parent2['practicals'][split:]
-        
-        if parent1['mentoring'] and parent2['mentoring']:
-            split = len(parent1['mentoring']) // 2
-            child['mentoring'] = parent1['mentoring'][:split] + parent2['mentoring'][split:]
-        
-        return child
+        return children
     
     def mutate(self, individual):
-        """Apply mutation to individual"""
-        if individual['lectures'] and random.random() < 0.3:
-            # Mutate a random lecture
-            idx = random.randint(0, len(individual['lectures']) - 1)
-            lecture = individual['lectures'][idx]
+        """Apply mutation to individual (copy-on-write, never edits genes in place)"""
+        n_lectures = self.kind_bounds(individual['events'])[PRACTICAL]
+        if n_lectures and random.random() < 0.3:
+            # Mutate a random lecture; the array is shared with parents and elites, so copy it
+            idx = random.randint(0, n_lectures - 1)
+            events = individual['events'].copy()
             
             # Change day or slot
             if random.random() < 0.5:
-                lecture['day'] = random.choice(self.days)
+                events[idx, EV_DAY] = random.randrange(len(self.days))
             else:
                 new_slot = random.choice([s for s in self.lecture_slots if s != 2])  # Skip lunch
-                lecture['slot_number'] = new_slot
-                slot = self.time_slots[new_slot]
-                lecture['start_time'] = slot[1]
-                lecture['end_time'] = slot[2]
+                events[idx, EV_START] = events[idx, EV_END] = new_slot
+            
+            fitness = self.mutated_fitness(individual, events, idx, n_lectures)
+            individual = {'events': events}
+            if fitness is not None:
+                individual['_fitness'] = fitness
         
         return individual
     
-    def evolve(self, population_size=30, generations=50, mutation_rate=0.2, elite_size=5):
-        """Run genetic algorithm evolution"""
-        print(f"Starting GA evolution for class {self.class_obj.name}")
+    def mutated_fitness(self, individual, events, idx, n_lectures):
+        """Cached fitness updated for lecture idx moving to its cell in events, or None if unknown"""
+        fitness = individual.get('_fitness')
+        if not fitness:  # Not evaluated yet, or clipped at 0 so the raw score is lost
+            return None
         
-        # Initialize population
-        self.population = []
-        for i in range(population_size):
-            print(f"Creating individual {i+1}/{population_size}")
-            individual = self.create_individual()
-            self.population.append(individual)
+        # Moving a lecture only changes room clashes (50 points each); hours and counts stay the same
+        cell_columns = [EV_ROOM, EV_DAY, EV_START]
+        old_cell = individual['events'][idx, cell_columns]
+        new_cell = events[idx, cell_columns]
+        if (old_cell == new_cell).all():
+            return fitness
+        
+        cells = events[:n_lectures, cell_columns]
+        if (cells == old_cell).all(axis=1).any():
+            fitness += 50
+        if (cells == new_cell).all(axis=1).sum() > 1:  # Besides the moved lecture itself
+            fitness -= 50
+        return max(fitness, 0)
+    
+    def evolve(self, population_size=30, generations=50, mutation_rate=0.2, elite_size=5,
+               patience=50, target_fitness=995):
+        """Run genetic algorithm evolution, stopping early once it reaches target_fitness or stalls"""
+        app.logger.info('Starting GA evolution for class %s', self.class_name)
+        
+        # Initialize population, in parallel when there is more than one core to use
+        if self.workers == 1:
+            self.population = [self.create_individual() for _ in range(population_size)]
+        else:
+            # One independent random seed per worker task
+            seeds = np.random.SeedSequence().spawn(self.workers)
+            counts = [population_size // self.workers + (i < population_size % self.workers)
+                      for i in range(self.workers)]
+            chunks = app.ga_pool.map(create_individuals, [self] * self.workers, counts, seeds)
+            self.population = [individual for chunk in chunks for individual in chunk]
+        app.logger.info('Created %d individuals', len(self.population))
+        
+        # Evaluate generations BLOCK_SIZE individuals per task, in parallel on the worker pool
+        # when there are several blocks and cores; otherwise the IPC costs more than it saves
+        evaluate = partial(evaluate_block, problem=self.problem)
+        stagnation = 0
         
         for generation in range(generations):
-            # Calculate fitness for each individual
-            fitness_scores = []
-            for individual in self.population:
-                fitness = self.calculate_fitness(individual)
-                fitness_scores.append((fitness, individual))
+            # Calculate fitness only for individuals without a cached score
+            # (elites and delta-updated mutants keep theirs)
+            stale = list({id(ind): ind for ind in self.population if '_fitness' not in ind}.values())
+            stacked, counts = stack_events(stale)
+            starts = range(0, len(stale), BLOCK_SIZE)
+            mapper = app.ga_pool.map if self.workers > 1 and len(stale) > BLOCK_SIZE else map
+            blocks = mapper(evaluate, [stacked[i:i + BLOCK_SIZE] for i in starts],
+                            [counts[i:i + BLOCK_SIZE] for i in starts])
+            for ind, score in zip(stale, (score for block in blocks for score in block)):
+                ind['_fitness'] = score
+            scores = np.fromiter((ind['_fitness'] for ind in self.population), dtype=np.int64,
+                                 count=len(self.population))
             
-            # Sort by fitness
-            fitness_scores.sort(key=lambda x: x[0], reverse=True)
+            # Rank by fitness; only the elites and tournament pool need an order
+            n_ranked = min(max(elite_size, 10), len(scores))
+            ranked = np.argpartition(-scores, n_ranked - 1)[:n_ranked]
+            ranked = [self.population[i] for i in ranked[np.argsort(-scores[ranked], kind='stable')]]
             
             # Update best solution
-            if fitness_scores[0][0] > self.best_fitness:
-                self.best_fitness = fitness_scores[0][0]
-                self.best_solution = copy.deepcopy(fitness_scores[0][1])
-                print(f"Generation {generation}: New best fitness = {self.best_fitness}")
+            if ranked[0]['_fitness'] > self.best_fitness:
+                self.best_fitness = ranked[0]['_fitness']
+                # Individuals are copy-on-write, so keeping a reference is safe
+                self.best_solution = ranked[0]
+                app.logger.info('Generation %d: New best fitness = %s', generation, self.best_fitness)
+                stagnation = 0
+            else:
+                stagnation += 1
+            
+            # Stop once the timetable is good enough or has stopped improving
+            if self.best_fitness >= target_fitness or stagnation >= patience:
+                app.logger.info('Stopping early after generation %d', generation)
+                break
             
             # Select elite
-            elites = [ind for _, ind in fitness_scores[:elite_size]]
+            elites = ranked[:elite_size]
             
             # Create next generation
             next_generation = elites.copy()
             
             # Generate offspring
-            while len(next_generation) < population_size:
-                # Tournament selection
-                if len(fitness_scores) > 10:
-                    parent1 = random.choice(fitness_scores[:10])[1]
-                    parent2 = random.choice(fitness_scores[:10])[1]
-                else:
-                    parent1 = fitness_scores[0][1] if fitness_scores else self.create_individual()
-                    parent2 = fitness_scores[1][1] if len(fitness_scores) > 1 else self.create_individual()
-                
-                child = self.crossover(parent1, parent2)
-                
+            n_offspring = max(population_size - len(next_generation), 0)
+            
+            # Tournament selection: draw all parent pairs from the top 10 at once
+            top = ranked[:10]
+            while len(top) < 2:
+                top.append(self.create_individual())
+            if len(self.population) > 10:
+                pairs = self.rng.integers(0, len(top), size=(n_offspring, 2))
+            else:
+                pairs = np.tile([0, 1], (n_offspring, 1))
+            mutations = (self.rng.random(n_offspring) < mutation_rate).tolist()
+            
+            # Crossover is deterministic, so children of the same parent pair are shared
+            # and evaluated once
+            unique_pairs, pair_index = np.unique(pairs, axis=0, return_inverse=True)
+            offspring = self.crossover_pairs(top, unique_pairs) if n_offspring else []
+            
+            for k, mutated in zip(pair_index.ravel().tolist(), mutations):
+                child = offspring[k]
+            
                 # Apply mutation
-                if random.random() < mutation_rate:
+                if mutated:
                     child = self.mutate(child)
-                
+            
                 next_generation.append(child)
             
             self.population = next_generation
         
-        print(f"GA completed. Best fitness: {self.best_fitness}")
+        app.logger.info('GA completed. Best fitness: %s', self.best_fitness)
         return self.best_solution
     
     def save_to_database(self, solution):
         """Save generated timetable to database"""
-        # Clear existing timetable for this class
-        Timetable.query.filter_by(class_id=self.class_id).delete()
-        PracticalSlot.query.filter_by(class_id=self.class_id).delete()
-        db.session.commit()
-        
-        # Save lectures
-        for lecture in solution['lectures']:
-            timetable_entry = Timetable(
-                class_id=self.class_id,
-                day=lecture['day'],
-                slot_number=lecture['slot_number'],
-                start_time=lecture['start_time'],
-                end_time=lecture['end_time'],
-                subject_id=lecture['subject_id'],
-                faculty_id=lecture['faculty_id'],
-                room_id=lecture['room_id'],
-                session_type='Lecture',
-                is_break=False
-            )
-            db.session.add(timetable_entry)
+        # Build plain row mappings and insert them in bulk, skipping the ORM unit of work
+        timetable_rows = []
+        practical_rows = []
         
-        # Save practicals
-        for practical in solution['practicals']:
-            practical_slot = PracticalSlot(
-                class_id=self.class_id,
-                batch_id=practical['batch_id'],
-                subject_id=practical['subject_id'],
-                faculty_id=practical['faculty_id'],
-                room_id=practical['room_id'],
-                day=practical['day'],
-                start_time=practical['start_time'],
-                end_time=practical['end_time']
-            )
-            db.session.add(practical_slot)
+        # Lectures, practicals and mentoring, decoded from the packed events (ID 0 is None)
+        for kind, subject_id, faculty_id, room_id, batch_id, day_idx, start_slot, end_slot in solution['events'].tolist():
+            row = {
+                'class_id': self.class_id,
+                'day': self.days[day_idx],
+                'start_time': self.time_slots[start_slot][1],
+                'end_time': self.time_slots[end_slot][2],
+                'subject_id': subject_id or None,
+                'faculty_id': faculty_id or None,
+                'room_id': room_id or None,
+                'batch_id': batch_id or None
+            }
+            timetable_rows.append(dict(row, slot_number=start_slot, session_type=SESSION_TYPES[kind],
+                                       is_break=False))
             
-            # Also add to timetable
-            timetable_entry = Timetable(
-                class_id=self.class_id,
-                day=practical['day'],
-                slot_number=practical['start_slot'],
-                start_time=practical['start_time'],
-                end_time=practical['end_time'],
-                subject_id=practical['subject_id'],
-                faculty_id=practical['faculty_id'],
-                room_id=practical['room_id'],
-                batch_id=practical['batch_id'],
-                session_type='Practical',
-                is_break=False
-            )
-            db.session.add(timetable_entry)
+            # Practicals are also recorded as practical slots
+            if kind == PRACTICAL:
+                practical_rows.append(row)
         
-        # Save mentoring
-        for mentoring in solution['mentoring']:
-            timetable_entry = Timetable(
-                class_id=self.class_id,
-                day=menturing['day'],
-                slot_number=menturing['slot_number'],
-                start_time=menturing['start_time'],
-                end_time=menturing['end_time'],
-                faculty_id=menturing['faculty_id'],
-                room_id=menturing['room_id'],
-                batch_id=menturing['batch_id'],
-                session_type='Mentoring',
-                is_break=False
-            )
-            db.session.add(timetable_entry)
+        # Lunch break slots
+        timetable_rows += [dict(row, class_id=self.class_id) for row in self.BREAK_TEMPLATE]
         
-        # Add break slots
-        for day in self.days:
-            # Lunch break
-            lunch_break = Timetable(
-                class_id=self.class_id,
-                day=day,
-                slot_number=2,
-                start_time='11:50',
-                end_time='12:40',
-                session_type='Break',
-                is_break=True
-            )
-            db.session.add(lunch_break)
+        # Replace the class timetable in one transaction so a failed save keeps the old one
+        try:
+            Timetable.query.filter_by(class_id=self.class_id).delete()
+            PracticalSlot.query.filter_by(class_id=self.class_id).delete()
+            db.session.bulk_insert_mappings(Timetable, timetable_rows)
+            db.session.bulk_insert_mappings(PracticalSlot, practical_rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
         
-        db.session.commit()
-        print(f"Timetable saved to database for class {self.class_id}")
+        app.logger.info('Timetable saved to database for class %s', self.class_id)
         return True
 
+def create_individuals(ga, count, seed):
+    """Create count individuals in a pool worker, drawing from its own seeded random streams"""
+    ga.rng = np.random.default_rng(seed)
+    random.seed(int(seed.generate_state(1)[0]))
+    return [ga.create_individual() for _ in range(count)]
+
+def set_generation_job(job_id, class_id, status, message=''):
+    """Record the state of a generation job in the cache until GENERATION_JOB_TIMEOUT"""
+    cache.set(f'generation-job/{job_id}', {'class_id': class_id, 'status': status, 'message': message},
+              timeout=app.config['GENERATION_JOB_TIMEOUT'])
+
+def evolve_timetable(class_id):
+    """Run the GA for class_id with the configured parameters, returning it and its best individual"""
+    ga = GeneticAlgorithmTimetable(class_id)
+    solution = ga.evolve(population_size=app.config['POPULATION_SIZE'],
+                         generations=app.config['GENERATIONS'],
+                         mutation_rate=app.config['MUTATION_RATE'],
+                         elite_size=app.config['ELITE_SIZE'])
+    return ga, solution
+
+def run_generation_job(job_id, class_id):
+    """Generate and save the timetable for class_id, recording the outcome with set_generation_job"""
+    with app.app_context():
+        set_generation_job(job_id, class_id, 'running')
+        try:
+            try:
+                ga, solution = evolve_timetable(class_id)
+            except BrokenProcessPool:
+                # A worker died and took the pool with it; start over once on a fresh one
+                app.logger.warning('GA worker pool broke, retrying class %s', class_id)
+                reset_ga_pool()
+                ga, solution = evolve_timetable(class_id)
+            
+            if solution and ga.best_fitness > 0:
+                ga.save_to_database(solution)
+                set_generation_job(job_id, class_id, 'done', 'Timetable generated successfully!')
+            else:
+                set_generation_job(job_id, class_id, 'failed', 'Failed to generate feasible timetable. '
+                                                               'Try adding more rooms or adjusting constraints.')
+        except Exception as e:
+            set_generation_job(job_id, class_id, 'failed', f'Error generating timetable: {str(e)}')
+            app.logger.exception('Timetable generation failed for class %s', class_id)
+
 # Routes
 @app.route('/')
 def index():
-    if current_user.is_authenticated:
+    if session.get('_user_id') and current_user.is_authenticated:
         return redirect(url_for('dashboard'))
     return redirect(url_for('login'))
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
-    if current_user.is_authenticated:
+    # Only a session with a user id can be logged in, so anonymous hits skip the user loader
+    if session.get('_user_id') and current_user.is_authenticated:
         return redirect(url_for('dashboard'))
     
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         
-        user = User.query.filter_by(username=username).first()
+        # Reject locked-out usernames before spending time on a password hash
+        failures_key = f'login-failures/{username}'
+        failures = cache.get(failures_key) or 0
+        if failures >= app.config['LOGIN_MAX_FAILURES']:
+            flash('Too many failed login attempts. Please try again later.', 'error')
+            return render_template('login.html'), 429
+        
+        # Only what check_password and login_user need
+        user = User.query.options(load_only(User.id, User.username, User.password_hash))\
+            .filter_by(username=username).first()
         
         if user and user.check_password(password):
+            if db.session.is_modified(user):
+                db.session.commit()  # Store a rehashed password
+            cache.delete(failures_key)
             login_user(user)
             flash('Logged in successfully!', 'success')
             return redirect(url_for('dashboard'))
         else:
+            # Each failure restarts the lockout window (an inc would drop the timeout on SimpleCache)
+            cache.set(failures_key, failures + 1, timeout=app.config['LOGIN_LOCKOUT_SECONDS'])
             flash('Invalid username or password', 'error')
     
     return render_template('login.html')
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
-    if current_user.is_authenticated:
+    if session.get('_user_id') and current_user.is_authenticated:
         return redirect(url_for('dashboard'))
     
     if request.method == 'POST':
@@ -716,12 +873,15 @@ def register():
             flash('Passwords do not match', 'error')
             return redirect(url_for('register'))
         
-        if User.query.filter_by(username=username).first():
-            flash('Username already exists', 'error')
-            return redirect(url_for('register'))
-        
-        if User.query.filter_by(email=email).first():
-            flash('Email already exists', 'error')
+        # One lookup for both unique fields; a username clash is reported first
+        taken = db.session.query(User.username)\
+            .filter(or_(User.username == username, User.email == email))\
+            .order_by((User.username == username).desc()).first()
+        if taken:
+            if taken.username == username:
+                flash('Username already exists', 'error')
+            else:
+                flash('Email already exists', 'error')
             return redirect(url_for('register'))
         
         user = User(username=username, email=email, is_admin=True)
@@ -735,7 +895,7 @@ def register():
     
     return render_template('register.html')
 
-@app.route('/logout')
+@app.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
@@ -745,14 +905,15 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # Get statistics
-    dept_count = Department.query.count()
-    class_count = Class.query.count()
-    faculty_count = Faculty.query.count()
-    subject_count = Subject.query.count()
+    # Get statistics (all four counts in one round trip)
+    dept_count, class_count, faculty_count, subject_count = db.session.execute(select(
+        *(select(func.count()).select_from(model).scalar_subquery()
+          for model in (Department, Class, Faculty, Subject))
+    )).one()
     
     # Get recent activity
-    recent_classes = Class.query.order_by(Class.created_at.desc()).limit(5).all()
+    recent_classes = Class.query.options(joinedload(Class.department))\
+        .order_by(Class.created_at.desc()).limit(5).all()
     
     return render_template('dashboard.html',
                          dept_count=dept_count,
@@ -765,7 +926,7 @@ def dashboard():
 @app.route('/departments')
 @login_required
 def manage_departments():
-    departments = Department.query.all()
+    departments = all_departments()
     return render_template('departments.html', departments=departments)
 
 @app.route('/departments/add', methods=['POST'])
@@ -775,13 +936,14 @@ def add_department():
     name = request.form.get('name')
     description = request.form.get('description')
     
-    if Department.query.filter_by(code=code).first():
+    if db.session.query(Department.query.filter_by(code=code).exists()).scalar():
         flash('Department code already exists', 'error')
         return redirect(url_for('manage_departments'))
     
     department = Department(code=code, name=name, description=description)
     db.session.add(department)
     db.session.commit()
+    invalidate_reference_data()
     
     flash('Department added successfully', 'success')
     return redirect(url_for('manage_departments'))
@@ -789,9 +951,11 @@ def add_department():
 @app.route('/departments/delete/<int:id>')
 @login_required
 def delete_department(id):
-    department = Department.query.get_or_404(id)
+    department = db.get_or_404(Department, id)
     db.session.delete(department)
     db.session.commit()
+    invalidate_reference_data()
+    invalidate_ga_inputs()
     flash('Department deleted successfully', 'success')
     return redirect(url_for('manage_departments'))
 
@@ -799,8 +963,8 @@ def delete_department(id):
 @app.route('/classes')
 @login_required
 def manage_classes():
-    classes = Class.query.all()
-    departments = Department.query.all()
+    classes = Class.query.options(joinedload(Class.department), selectinload(Class.batches)).all()
+    departments = all_departments()
     semesters = list(range(1, 7))
     return render_template('classes.html', classes=classes, departments=departments, semesters=semesters)
 
@@ -814,7 +978,7 @@ def add_class():
     semester = request.form.get('semester')
     strength = request.form.get('strength', 60)
     
-    if Class.query.filter_by(code=code).first():
+    if db.session.query(Class.query.filter_by(code=code).exists()).scalar():
         flash('Class code already exists', 'error')
         return redirect(url_for('manage_classes'))
     
@@ -830,14 +994,12 @@ def add_class():
     db.session.add(class_obj)
     db.session.flush()  # Get the ID
     
-    # Create batches (TB1, TB2, TB3)
-    for i in range(1, 4):
-        batch = Batch(
-            name=f'TB{i}',
-            code=f'{code}_TB{i}',
-            class_id=class_obj.id
-        )
-        db.session.add(batch)
+    # Create batches (TB1, TB2, TB3) in one INSERT
+    db.session.bulk_insert_mappings(Batch, [{
+        'name': f'TB{i}',
+        'code': f'{code}_TB{i}',
+        'class_id': class_obj.id
+    } for i in range(1, 4)])
     
     db.session.commit()
     
@@ -848,8 +1010,8 @@ def add_class():
 @app.route('/subjects')
 @login_required
 def manage_subjects():
-    subjects = Subject.query.all()
-    departments = Department.query.all()
+    subjects = all_subjects()
+    departments = all_departments()
     return render_template('subjects.html', subjects=subjects, departments=departments)
 
 @app.route('/subjects/add', methods=['POST'])
@@ -863,7 +1025,7 @@ def add_subject():
     credits = request.form.get('credits', 3, type=int)
     department_id = request.form.get('department_id')
     
-    if Subject.query.filter_by(code=code).first():
+    if db.session.query(Subject.query.filter_by(code=code).exists()).scalar():
         flash('Subject code already exists', 'error')
         return redirect(url_for('manage_subjects'))
     
@@ -879,6 +1041,7 @@ def add_subject():
     
     db.session.add(subject)
     db.session.commit()
+    invalidate_reference_data()
     
     flash('Subject added successfully', 'success')
     return redirect(url_for('manage_subjects'))
@@ -887,8 +1050,8 @@ def add_subject():
 @app.route('/faculty')
 @login_required
 def manage_faculty():
-    faculty_list = Faculty.query.all()
-    departments = Department.query.all()
+    faculty_list = all_faculty()
+    departments = all_departments()
     return render_template('faculty.html', faculty_list=faculty_list, departments=departments)
 
 @app.route('/faculty/add', methods=['POST'])
@@ -902,12 +1065,15 @@ def add_faculty():
     designation = request.form.get('designation')
     qualification = request.form.get('qualification')
     
-    if Faculty.query.filter_by(employee_id=employee_id).first():
-        flash('Employee ID already exists', 'error')
-        return redirect(url_for('manage_faculty'))
-    
-    if Faculty.query.filter_by(email=email).first():
-        flash('Email already exists', 'error')
+    # One lookup for both unique fields; an employee ID clash is reported first
+    taken = db.session.query(Faculty.employee_id)\
+        .filter(or_(Faculty.employee_id == employee_id, Faculty.email == email))\
+        .order_by((Faculty.employee_id == employee_id).desc()).first()
+    if taken:
+        if taken.employee_id == employee_id:
+            flash('Employee ID already exists', 'error')
+        else:
+            flash('Email already exists', 'error')
         return redirect(url_for('manage_faculty'))
     
     faculty = Faculty(
@@ -922,6 +1088,7 @@ def add_faculty():
     
     db.session.add(faculty)
     db.session.commit()
+    invalidate_reference_data()
     
     flash('Faculty added successfully', 'success')
     return redirect(url_for('manage_faculty'))
@@ -930,8 +1097,8 @@ def add_faculty():
 @app.route('/rooms')
 @login_required
 def manage_rooms():
-    rooms = Room.query.all()
-    departments = Department.query.all()
+    rooms = Room.query.options(joinedload(Room.department)).all()
+    departments = all_departments()
     return render_template('rooms.html', rooms=rooms, departments=departments)
 
 @app.route('/rooms/add', methods=['POST'])
@@ -943,7 +1110,7 @@ def add_room():
     department_id = request.form.get('department_id')
     equipment = request.form.get('equipment')
     
-    if Room.query.filter_by(room_number=room_number).first():
+    if db.session.query(Room.query.filter_by(room_number=room_number).exists()).scalar():
         flash('Room number already exists', 'error')
         return redirect(url_for('manage_rooms'))
     
@@ -957,6 +1124,7 @@ def add_room():
     
     db.session.add(room)
     db.session.commit()
+    invalidate_ga_inputs()  # Every class can use the new room
     
     flash('Room added successfully', 'success')
     return redirect(url_for('manage_rooms'))
@@ -965,10 +1133,13 @@ def add_room():
 @app.route('/class-subjects/<int:class_id>')
 @login_required
 def manage_class_subjects(class_id):
-    class_obj = Class.query.get_or_404(class_id)
-    subjects = Subject.query.all()
-    faculty_list = Faculty.query.all()
-    class_subjects = ClassSubject.query.filter_by(class_id=class_id).all()
+    class_obj = db.session.get(Class, class_id, options=[joinedload(Class.department)])
+    if class_obj is None:
+        abort(404)
+    subjects = all_subjects()
+    faculty_list = all_faculty()
+    class_subjects = ClassSubject.query.filter_by(class_id=class_id)\
+        .options(joinedload(ClassSubject.subject_ref), joinedload(ClassSubject.faculty_ref)).all()
     
     return render_template('class_subjects.html',
                          class_obj=class_obj,
@@ -979,15 +1150,14 @@ def manage_class_subjects(class_id):
 @app.route('/class-subjects/add', methods=['POST'])
 @login_required
 def add_class_subject():
-    class_id = request.form.get('class_id')
+    class_id = request.form.get('class_id', type=int)
     subject_id = request.form.get('subject_id')
     faculty_id = request.form.get('faculty_id')
     lecture_slots = request.form.get('lecture_slots', 3, type=int)
     practical_slots = request.form.get('practical_slots', 2, type=int)
     
     # Check if already assigned
-    existing = ClassSubject.query.filter_by(class_id=class_id, subject_id=subject_id).first()
-    if existing:
+    if db.session.query(ClassSubject.query.filter_by(class_id=class_id, subject_id=subject_id).exists()).scalar():
         flash('Subject already assigned to this class', 'error')
         return redirect(url_for('manage_class_subjects', class_id=class_id))
     
@@ -1001,6 +1171,7 @@ def add_class_subject():
     
     db.session.add(class_subject)
     db.session.commit()
+    invalidate_ga_inputs(class_id)
     
     flash('Subject assigned successfully', 'success')
     return redirect(url_for('manage_class_subjects', class_id=class_id))
@@ -1009,9 +1180,12 @@ def add_class_subject():
 @app.route('/batch-mentors/<int:class_id>')
 @login_required
 def manage_batch_mentors(class_id):
-    class_obj = Class.query.get_or_404(class_id)
-    batches = Batch.query.filter_by(class_id=class_id).all()
-    faculty_list = Faculty.query.all()
+    class_obj = db.session.get(Class, class_id, options=[joinedload(Class.department)])
+    if class_obj is None:
+        abort(404)
+    batches = Batch.query.filter_by(class_id=class_id)\
+        .options(joinedload(Batch.mentor).joinedload(Faculty.department)).all()
+    faculty_list = all_faculty()
     
     return render_template('batch_mentors.html',
                          class_obj=class_obj,
@@ -1021,22 +1195,29 @@ def manage_batch_mentors(class_id):
 @app.route('/batch-mentors/assign', methods=['POST'])
 @login_required
 def assign_batch_mentor():
-    batch_id = request.form.get('batch_id')
+    batch_id = request.form.get('batch_id', type=int)
+    class_id = request.form.get('class_id', type=int)
     mentor_id = request.form.get('mentor_id')
     
-    batch = Batch.query.get_or_404(batch_id)
-    batch.mentor_id = mentor_id
+    # Single UPDATE; class_id comes from the form so the batch never has to be loaded
+    result = db.session.execute(update(Batch)
+                                .where(Batch.id == batch_id, Batch.class_id == class_id)
+                                .values(mentor_id=mentor_id))
+    if not result.rowcount:
+        abort(404)
     
     db.session.commit()
+    invalidate_ga_inputs(class_id)
     
     flash('Mentor assigned successfully', 'success')
-    return redirect(url_for('manage_batch_mentors', class_id=batch.class_id))
+    return redirect(url_for('manage_batch_mentors', class_id=class_id))
 
 # Generate Timetable
 @app.route('/generate-timetable')
 @login_required
 def generate_timetable():
-    classes = Class.query.all()
+    classes = Class.query.options(joinedload(Class.department), selectinload(Class.batches),
+                                  selectinload(Class.subjects)).all()
     return render_template('generate.html', classes=classes)
 
 @app.route('/generate-timetable/run/<int:class_id>')
@@ -1044,89 +1225,97 @@ def generate_timetable():
 def run_timetable_generation(class_id):
     try:
         # Check if class exists
-        class_obj = Class.query.get_or_404(class_id)
+        db.get_or_404(Class, class_id)
         
         # Check if class has subjects assigned
-        if not ClassSubject.query.filter_by(class_id=class_id).first():
+        if not db.session.query(ClassSubject.query.filter_by(class_id=class_id).exists()).scalar():
             flash('Please assign subjects to this class first', 'error')
             return redirect(url_for('manage_class_subjects', class_id=class_id))
         
         # Check if rooms exist
-        rooms = Room.query.all()
-        if not rooms:
+        if not db.session.query(Room.query.exists()).scalar():
             flash('Please add classrooms and labs first', 'error')
             return redirect(url_for('manage_rooms'))
         
-        # Initialize and run genetic algorithm
-        ga = GeneticAlgorithmTimetable(class_id)
-        solution = ga.evolve(population_size=20, generations=30)  # Reduced for speed
-        
-        if solution and ga.best_fitness > 0:
-            ga.save_to_database(solution)
-            flash('Timetable generated successfully!', 'success')
-        else:
-            flash('Failed to generate feasible timetable. Try adding more rooms or adjusting constraints.', 'error')
+        # Run the genetic algorithm in the background; the timetable page polls for the result
+        job_id = uuid.uuid4().hex
+        set_generation_job(job_id, class_id, 'queued')
+        app.ga_jobs.submit(run_generation_job, job_id, class_id)
+        return redirect(url_for('view_timetable', class_id=class_id, job=job_id))
     
     except Exception as e:
         flash(f'Error generating timetable: {str(e)}', 'error')
-        import traceback
-        print(traceback.format_exc())
+        app.logger.exception('Could not start timetable generation for class %s', class_id)
     
     return redirect(url_for('view_timetable', class_id=class_id))
 
+@app.route('/generate-timetable/status/<job_id>')
+@login_required
+def timetable_generation_status(job_id):
+    job = cache.get(f'generation-job/{job_id}')
+    if job is None:
+        return jsonify({'status': 'unknown'}), 404
+    
+    # Report a finished job once, as a flash message for the reloaded page
+    if job['status'] in ('done', 'failed'):
+        cache.delete(f'generation-job/{job_id}')
+        flash(job['message'], 'success' if job['status'] == 'done' else 'error')
+    return jsonify(job)
+
 # View Timetable
 @app.route('/view-timetable')
 @login_required
 def view_timetable():
     class_id = request.args.get('class_id', type=int)
-    classes = Class.query.all()
+    # The class picker shows departments; the grid looks up subject codes and batch mentors
+    classes = Class.query.options(joinedload(Class.department),
+                                  selectinload(Class.subjects).joinedload(ClassSubject.subject_ref),
+                                  selectinload(Class.batches).joinedload(Batch.mentor)).all()
     
     timetable_data = None
-    time_slots = app.config['TIME_SLOTS']
     
     if class_id:
         # Get timetable for selected class
         timetable_entries = Timetable.query.filter_by(class_id=class_id)\
+            .options(joinedload(Timetable.faculty_ref), joinedload(Timetable.room), joinedload(Timetable.batch))\
             .order_by(Timetable.day, Timetable.slot_number).all()
         
-        # Organize by day and slot
-        timetable_data = {}
-        days = app.config['DAYS']
-        slots = list(range(7))
+        # Organize by day and slot in a single pass
+        grouped = defaultdict(list)
+        for entry in timetable_entries:
+            grouped[(entry.day, entry.slot_number)].append(entry)
         
-        for day in days:
-            timetable_data[day] = {}
-            for slot in slots:
-                entries = [e for e in timetable_entries if e.day == day and e.slot_number == slot]
-                timetable_data[day][slot] = entries
+        timetable_data = {day: {slot: grouped[(day, slot)] for slot in SLOT_INDICES} for day in DAYS}
     
     return render_template('timetable.html',
                          classes=classes,
                          class_id=class_id,
+                         job_id=request.args.get('job'),
                          timetable_data=timetable_data,
-                         time_slots=time_slots)
+                         time_slots=TIME_SLOTS)
 
 # Initialize Sample Data
 @app.route('/init-sample-data')
 def init_sample_data():
     """Initialize with sample data for testing"""
-    # Clear existing data
-    db.session.query(Timetable).delete()
-    db.session.query(PracticalSlot).delete()
-    db.session.query(ClassSubject).delete()
-    db.session.query(Batch).delete()
-    db.session.query(Class).delete()
-    db.session.query(Faculty).delete()
-    db.session.query(Subject).delete()
-    db.session.query(Room).delete()
-    db.session.query(Department).delete()
+    # Clear existing data, children before parents; everything below runs in one
+    # transaction, flushing only for IDs
+    tables = [model.__table__ for model in (Timetable, PracticalSlot, ClassSubject, Batch, Class,
+                                            Faculty, Subject, Room, Department)]
+    if db.engine.dialect.name == 'postgresql':
+        preparer = db.engine.dialect.identifier_preparer
+        db.session.execute(text('TRUNCATE ' + ', '.join(preparer.format_table(t) for t in tables)
+                                + ' RESTART IDENTITY CASCADE'))
+    else:
+        for table in tables:
+            db.session.execute(table.delete())
     
     # Create departments
     dept1 = Department(code='CSE', name='Computer Engineering', description='Computer Science and Engineering Department')
     dept2 = Department(code='MECH', name='Mechanical Engineering', description='Mechanical Engineering Department')
     dept3 = Department(code='ENTC', name='Electronics & Telecommunication', description='ENTC Department')
     db.session.add_all([dept1, dept2, dept3])
-    db.session.commit()
+    db.session.flush()
     
     # Create faculty
     faculty1 = Faculty(employee_id='F001', name='Dr. Rajesh Kumar', email='rajesh@college.edu', 
@@ -1139,7 +1328,6 @@ def init_sample_data():
                       phone='9876543212', department_id=dept2.id, designation='Professor',
                       qualification='Ph.D. in Mechanical Engineering')
     db.session.add_all([faculty1, faculty2, faculty3])
-    db.session.commit()
     
     # Create rooms
     room1 = Room(room_number='A-101', room_type='Classroom', capacity=60, department_id=dept1.id)
@@ -1150,7 +1338,6 @@ def init_sample_data():
     room5 = Room(room_number='LAB-2', room_type='Lab', capacity=30, department_id=dept2.id,
                 equipment='CNC Machines, Lathes')
     db.session.add_all([room1, room2, room3, room4, room5])
-    db.session.commit()
     
     # Create subjects
     sub1 = Subject(code='CSE101', name='Programming Fundamentals', type='Theory', 
@@ -1162,20 +1349,21 @@ def init_sample_data():
     sub4 = Subject(code='MAT101', name='Engineering Mathematics', type='Theory',
                   lecture_hours=4, practical_hours=0, credits=3)
     db.session.add_all([sub1, sub2, sub3, sub4])
-    db.session.commit()
     
     # Create class
     class1 = Class(name='Computer Engineering', code='CO-1', year='FY', 
                   department_id=dept1.id, semester=1, strength=60)
     db.session.add(class1)
-    db.session.flush()
+    db.session.flush()  # IDs for the faculty, subjects and class
     
     # Create batches
-    for i in range(1, 4):
-        batch = Batch(name=f'TB{i}', code=f'CO-1_TB{i}', class_id=class1.id, mentor_id=faculty1.id if i == 1 else faculty2.id if i == 2 else faculty3.id)
-        db.session.add(batch)
-    
-    db.session.commit()
+    mentors = [faculty1, faculty2, faculty3]
+    db.session.bulk_insert_mappings(Batch, [{
+        'name': f'TB{i}',
+        'code': f'CO-1_TB{i}',
+        'class_id': class1.id,
+        'mentor_id': mentors[i - 1].id
+    } for i in range(1, 4)])
     
     # Assign subjects to class
     cs1 = ClassSubject(class_id=class1.id, subject_id=sub1.id, faculty_id=faculty1.id,
@@ -1188,6 +1376,8 @@ def init_sample_data():
                       lecture_slots_per_week=4, practical_slots_per_week=0)
     db.session.add_all([cs1, cs2, cs3, cs4])
     db.session.commit()
+    invalidate_reference_data()
+    invalidate_ga_inputs()
     
     flash('Sample data initialized successfully!', 'success')
     return redirect(url_for('dashboard'))
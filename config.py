@@ -5,15 +5,26 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
+    # Bytes, so itsdangerous signs the session cookie without encoding the key every request
+    SECRET_KEY = os.environ['SECRET_KEY'].encode() if os.environ.get('SECRET_KEY') else b'dev-key-12345'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///database.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Connection pool for server databases; raise DB_POOL_SIZE along with the number of
+    # worker threads. SQLite keeps the default pool Flask-SQLAlchemy picks for it.
+    SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_pre_ping': True,   # Drop connections the server has closed
+        'pool_recycle': 1800     # Recycle before typical server idle timeouts
+    }
+    
+    # Sessions are Flask's signed cookies, so there is no per-request session store lookup
     SESSION_PERMANENT = False
-    SESSION_TYPE = 'filesystem'
     
-    # Timetable settings
-    DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    TIME_SLOTS = [
+    # Timetable settings (immutable, built once at import)
+    DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')
+    TIME_SLOTS = (
         ('09:40', '10:40'),
         ('10:50', '11:50'),
         ('11:50', '12:40'),  # Lunch break
@@ -21,12 +32,25 @@ class Config:
         ('13:50', '14:50'),
         ('15:00', '16:00'),
         ('16:10', '17:10')
-    ]
-    LECTURE_SLOT_INDICES = [0, 1, 3, 4, 5, 6]  # Indices excluding lunch break
-    PRACTICAL_SLOTS = [('14:00', '16:00'), ('15:00', '17:10')]
+    )
+    SLOT_INDICES = tuple(range(len(TIME_SLOTS)))
+    LECTURE_SLOT_INDICES = (0, 1, 3, 4, 5, 6)  # Indices excluding lunch break
+    PRACTICAL_SLOTS = (('14:00', '16:00'), ('15:00', '17:10'))
     
     # Genetic Algorithm parameters
     POPULATION_SIZE = 100
     GENERATIONS = 500
     MUTATION_RATE = 0.1
-    ELITE_SIZE = 20
\ No newline at end of file
+    ELITE_SIZE = 20
+    
+    # Reference-data cache; switch to RedisCache (CACHE_REDIS_URL) when running several workers
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'SimpleCache'
+    CACHE_DEFAULT_TIMEOUT = 300
+    GENERATION_JOB_TIMEOUT = 3600  # Seconds a generation job's status is kept
+    
+    # Development aid: any lazy load that would hit the database raises instead (catches N+1 queries)
+    RAISE_ON_LAZY_LOAD = bool(os.environ.get('RAISE_ON_LAZY_LOAD'))
+    
+    # Failed logins allowed per username before it is locked out for LOGIN_LOCKOUT_SECONDS
+    LOGIN_MAX_FAILURES = 5
+    LOGIN_LOCKOUT_SECONDS = 300
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py configures its database at import time, so point it at a scratch file first
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as timetable_app
+from app import (app, db, Batch, Class, ClassSubject, Department, Faculty, Room, Subject, Timetable,
+                 GeneticAlgorithmTimetable)
+
+
+@pytest.fixture
+def ga():
+    with app.app_context():
+        department = Department(code='CSE', name='Computer Engineering')
+        db.session.add(department)
+        db.session.flush()
+        class_obj = Class(name='SY CSE', code='SYCSE', year='SY', department_id=department.id,
+                          semester=3, strength=60)
+        subject = Subject(code='CS201', name='Data Structures', type='Theory', department_id=department.id)
+        faculty = Faculty(employee_id='F001', name='Dr. Mentor', email='mentor@college.edu')
+        room = Room(room_number='CR-1', room_type='Classroom', capacity=60)
+        db.session.add_all([class_obj, subject, faculty, room])
+        db.session.flush()
+        db.session.add_all([
+            Batch(name='Batch A', code='SYCSE-A', class_id=class_obj.id, mentor_id=faculty.id),
+            ClassSubject(class_id=class_obj.id, subject_id=subject.id, faculty_id=faculty.id,
+                         lecture_slots_per_week=1, practical_slots_per_week=0)
+        ])
+        db.session.commit()
+
+        ga = GeneticAlgorithmTimetable(class_obj.id)
+        yield ga
+
+        db.session.rollback()
+        for model in (Timetable, ClassSubject, Batch, Room, Faculty, Subject, Class, Department):
+            model.query.delete()
+        db.session.commit()
+        timetable_app.invalidate_ga_inputs()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import app as timetable_app
+from app import LECTURE, MENTORING
+from _ga_kernels import FitnessProblem, evaluate_population, stack_events
+
+
+def fresh_fitness(problem, individual):
+    return evaluate_population(*stack_events([individual]), problem)[0]
+
+
+@pytest.mark.parametrize('days, target_day', [
+    ((0, 1), 0),  # Onto the other lecture's cell: one new room clash
+    ((0, 0), 1),  # Off the shared cell: the clash goes away
+])
+def test_mutate_keeps_cached_fitness_exact(ga, monkeypatch, days, target_day):
+    class_subject, batch, room = ga.class_subjects[0], ga.batches[0], ga.classrooms[0]
+    individual = ga.pack([
+        (LECTURE, class_subject.subject_id, class_subject.faculty_id, room.id, 0, days[0], 0, 0),
+        (LECTURE, class_subject.subject_id, class_subject.faculty_id, room.id, 0, days[1], 0, 0),
+        (MENTORING, 0, batch.mentor_id, room.id, batch.id, 2, 1, 1)
+    ])
+    individual['_fitness'] = fresh_fitness(ga.problem, individual)
+
+    # Always mutate, always move the second lecture's day
+    monkeypatch.setattr(timetable_app.random, 'random', lambda: 0.0)
+    monkeypatch.setattr(timetable_app.random, 'randint', lambda a, b: 1)
+    monkeypatch.setattr(timetable_app.random, 'randrange', lambda n: target_day)
+    mutated = ga.mutate(individual)
+
+    assert mutated['events'][1, timetable_app.EV_DAY] == target_day
+    assert mutated['_fitness'] != individual['_fitness']
+    assert mutated['_fitness'] == fresh_fitness(ga.problem, mutated)
+
+
+def test_evaluate_population_penalties():
+    problem = FitnessProblem(
+        n_days=5,
+        n_slots=7,
+        subject_lookup=np.array([2, 0, 1], dtype=np.int64),  # Subjects 1 and 2 belong to the class
+        required_hours=np.array([[2, 1], [0, 0]], dtype=np.int64),
+        penalty_weights=np.array([30, 40], dtype=np.int64),
+        required_mentoring=1
+    )
+    # Both subject 1 lectures share room 1 on Monday slot 0, subject 2 and mentoring are missing
+    clashing = {'events': np.array([
+        (LECTURE, 1, 1, 1, 0, 0, 0, 0),
+        (LECTURE, 1, 1, 1, 0, 0, 0, 0)
+    ], dtype=np.int32)}
+    complete = {'events': np.array([
+        (LECTURE, 1, 1, 1, 0, 0, 0, 0),
+        (LECTURE, 1, 1, 1, 0, 1, 0, 0),
+        (LECTURE, 2, 1, 1, 0, 2, 0, 0),
+        (MENTORING, 0, 1, 1, 1, 3, 1, 1)
+    ], dtype=np.int32)}
+
+    fitness = evaluate_population(*stack_events([clashing, complete]), problem)
+
+    assert fitness.tolist() == [1000 - 50 - 30 - 100, 1000]
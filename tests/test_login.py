@@ -0,0 +1,20 @@
+import time
+
+from app import app, cache
+
+
+def test_lockout_expires(monkeypatch):
+    monkeypatch.setitem(app.config, 'LOGIN_MAX_FAILURES', 2)
+    monkeypatch.setitem(app.config, 'LOGIN_LOCKOUT_SECONDS', 1)
+    cache.delete('login-failures/admin')
+    client = app.test_client()
+
+    for _ in range(2):
+        assert client.post('/login', data={'username': 'admin', 'password': 'wrong'}).status_code == 200
+    # Locked out, even with the right password
+    assert client.post('/login', data={'username': 'admin', 'password': 'admin123'}).status_code == 429
+
+    time.sleep(1.1)
+    response = client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 302
+    assert cache.get('login-failures/admin') is None
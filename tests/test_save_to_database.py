@@ -0,0 +1,38 @@
+import pytest
+
+from app import db, Timetable, LECTURE, MENTORING
+
+
+def individual_with_mentoring(ga):
+    """One lecture on Monday slot 0 and one mentoring session on Tuesday slot 1"""
+    class_subject, batch, room = ga.class_subjects[0], ga.batches[0], ga.classrooms[0]
+    return ga.pack([
+        (LECTURE, class_subject.subject_id, class_subject.faculty_id, room.id, 0, 0, 0, 0),
+        (MENTORING, 0, batch.mentor_id, room.id, batch.id, 1, 1, 1)
+    ])
+
+
+def test_save_writes_mentoring_rows(ga):
+    ga.save_to_database(individual_with_mentoring(ga))
+
+    mentoring = Timetable.query.filter_by(class_id=ga.class_id, session_type='Mentoring').all()
+    assert [(m.day, m.slot_number, m.batch_id, m.faculty_id) for m in mentoring] == \
+        [('Tuesday', 1, ga.batches[0].id, ga.batches[0].mentor_id)]
+    assert Timetable.query.filter_by(class_id=ga.class_id, session_type='Lecture').count() == 1
+    assert Timetable.query.filter_by(class_id=ga.class_id, is_break=True).count() == len(ga.days)
+
+
+def test_failed_save_keeps_previous_timetable(ga, monkeypatch):
+    ga.save_to_database(individual_with_mentoring(ga))
+    saved = Timetable.query.filter_by(class_id=ga.class_id).count()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError('insert failed')
+
+    monkeypatch.setattr(db.session, 'bulk_insert_mappings', fail)
+    with pytest.raises(RuntimeError):
+        ga.save_to_database(ga.pack([]))
+    monkeypatch.undo()
+
+    assert Timetable.query.filter_by(class_id=ga.class_id).count() == saved
+    assert Timetable.query.filter_by(class_id=ga.class_id, session_type='Mentoring').count() == 1